@@ -0,0 +1,60 @@
+from cpptree.models import Node, ConditionalBranch, ConditionalGroup, FileRoot
+from dataclasses import replace
+
+def intern_tree(node: Node | FileRoot, table: dict[Node, Node] | None = None) -> Node | FileRoot:
+    """
+    Return a canonical instance of ``node`` (a node or a whole FileRoot) in
+    which structurally identical subtrees are shared. Walks bottom-up; pass the
+    same ``table`` across calls to deduplicate between files.
+    """
+    if table is None:
+        table = {}
+    # iterative post-order (explicit stack, like tostring), so nesting depth is
+    # not bounded by the recursion limit; canon maps id(original) -> canonical
+    canon: dict[int, object] = {}
+    stack: list[tuple[object, bool]] = [(node, False)]
+    while stack:
+        n, expanded = stack.pop()
+        if id(n) in canon:
+            continue
+        children = _children(n)
+        if children and not expanded:
+            stack.append((n, True))
+            stack.extend((c, False) for c in children)
+            continue
+        rebuilt = _rebuild(n, canon)
+        canon[id(n)] = table.setdefault(rebuilt, rebuilt)
+    return canon[id(node)]
+
+def _children(node: object) -> tuple:
+    if isinstance(node, ConditionalGroup):
+        return (node.entry, *node.elifs, *node.else_body)
+    if isinstance(node, ConditionalBranch):
+        return node.body
+    if isinstance(node, FileRoot):
+        return node.items
+    return ()
+
+def _rebuild(node: object, canon: dict[int, object]) -> object:
+    # swap in canonical children; keep the original when nothing changed
+    if isinstance(node, ConditionalGroup):
+        entry = canon[id(node.entry)]
+        elifs = _canon_seq(node.elifs, canon)
+        else_body = _canon_seq(node.else_body, canon)
+        if entry is not node.entry or elifs is not node.elifs or else_body is not node.else_body:
+            node = replace(node, entry=entry, elifs=elifs, else_body=else_body)
+    elif isinstance(node, ConditionalBranch):
+        body = _canon_seq(node.body, canon)
+        if body is not node.body:
+            node = replace(node, body=body)
+    elif isinstance(node, FileRoot):
+        items = _canon_seq(node.items, canon)
+        if items is not node.items:
+            node = replace(node, items=items)
+    return node
+
+def _canon_seq(items: tuple, canon: dict[int, object]) -> tuple:
+    new = tuple(canon[id(it)] for it in items)
+    if all(a is b for a, b in zip(new, items)):
+        return items
+    return new
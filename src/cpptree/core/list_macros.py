@@ -1,10 +1,11 @@
 from cpptree.models import Node
 from typing import Sequence
-from pydantic import BaseModel
+from dataclasses import dataclass
 
-class MacroInfo(BaseModel):
+@dataclass(frozen=True, slots=True, kw_only=True)
+class MacroInfo:
     affected: list[Node]
     macros: dict[str, str]
 
 def list_macros(nodes: Sequence[Node]) -> list[MacroInfo]:
-    pass
\ No newline at end of file
+    pass
@@ -1,20 +1,104 @@
-from cpptree.models import Node
-from typing import Sequence
-from functools import singledispatch
+from cpptree.models import Node, TextBlock, DirectiveNode, ConditionalBranch, ConditionalGroup
+from collections import deque
+from typing import Callable, Sequence
 
-@singledispatch
-def tostring(node: Sequence[Node] | Node | dict[str, Sequence[Node]]) -> str:
-    pass
+# -----------------------
+# emitters
+# -----------------------
+# Each emitter appends fragments of one node kind to a shared buffer; the
+# public entry point joins it once. Dispatch goes through _HANDLERS keyed by
+# the exact type, since the Node union is closed.
+#
+# Traversal is iterative: emitters never recurse, they push what comes next
+# onto an explicit stack (last pushed = emitted first), so deeply nested
+# #if groups cost no Python frames and cannot hit the recursion limit.
+
+class _Line:
+    """Stack frame for a directive line that closes or splits a group (#else, #endif)."""
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+# Raw directive lines usually come without their newline; like text, one
+# that already ends in '\n' is not given a second.
+def _emit_line(line: _Line, out: list[str], stack: deque) -> None:
+    text = line.text
+    out.append(text)
+    if not text.endswith("\n"):
+        out.append("\n")
+
+def _emit_text(node: TextBlock, out: list[str], stack: deque) -> None:
+    content = node.content
+    if content:
+        out.append(content)
+        # directives must start on a fresh line
+        if not content.endswith("\n"):
+            out.append("\n")
+
+def _emit_directive(node: DirectiveNode, out: list[str], stack: deque) -> None:
+    raw = node.raw
+    out.append(raw)
+    if not raw.endswith("\n"):
+        out.append("\n")
 
-@tostring.register(Sequence[Node])
-def _tostring_nodes(nodes: Sequence[Node]) -> str:
-    pass
+def _emit_branch(branch: ConditionalBranch, out: list[str], stack: deque) -> None:
+    raw = branch.raw
+    out.append(raw)
+    if not raw.endswith("\n"):
+        out.append("\n")
+    stack.extend(reversed(branch.body))
 
-@tostring.register(Node)
-def _tostring_node(node: Node) -> str:
-    pass
+def _emit_group(node: ConditionalGroup, out: list[str], stack: deque) -> None:
+    push = stack.append
+    push(_Line(node.endif_raw))
+    if node.else_raw:
+        stack.extend(reversed(node.else_body))
+        push(_Line(node.else_raw))
+    stack.extend(reversed(node.elifs))
+    push(node.entry)
 
-@tostring.register(dict[str, Sequence[Node]])
-def _tostring_files(files: dict[str, Sequence[Node]]) -> str:
-    # Handle include statements
-    pass
\ No newline at end of file
+def _emit_nodes(nodes: Sequence[Node], out: list[str], stack: deque) -> None:
+    stack.extend(reversed(nodes))
+
+def _quote_path(path: str) -> str:
+    # escape like GCC's cpp_quote_string: backslash, double quote, newline
+    return path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _emit_files(files: dict[str, Sequence[Node]], out: list[str], stack: deque) -> None:
+    # one GCC-style line marker per file, in insertion order
+    push = stack.append
+    for path, nodes in reversed(files.items()):
+        push(nodes)
+        push(_Line(f'# 1 "{_quote_path(path)}"'))
+
+_HANDLERS: dict[type, Callable[[object, list[str], deque], None]] = {
+    TextBlock: _emit_text,
+    DirectiveNode: _emit_directive,
+    ConditionalGroup: _emit_group,
+    ConditionalBranch: _emit_branch,
+    _Line: _emit_line,
+    list: _emit_nodes,
+    tuple: _emit_nodes,
+    dict: _emit_files,
+}
+
+def _handler(node: object) -> Callable[[object, list[str], deque], None]:
+    try:
+        return _HANDLERS[type(node)]
+    except KeyError:
+        raise TypeError(f"tostring() cannot render {type(node).__name__}") from None
+
+def tostring(node: Sequence[Node] | Node | dict[str, Sequence[Node]]) -> str:
+    """Render a node, a list/tuple of nodes, or a {path: nodes} dict back to source text."""
+    out: list[str] = []
+    stack = deque((node,))
+    # hot loop: keep the table lookup local and skip the _handler() call frame
+    pop, handlers = stack.pop, _HANDLERS
+    while stack:
+        obj = pop()
+        handler = handlers.get(type(obj))
+        if handler is None:
+            handler = _handler(obj)  # raises TypeError
+        handler(obj, out, stack)
+    return "".join(out)
@@ -0,0 +1,108 @@
+from cpptree.models import _DIRECTIVE_CHECKS
+from typing import Sequence
+
+# numba/numpy are optional (pip install cpptree[fast]); without them the bulk
+# check runs the same per-kind checks the node constructors use.
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = njit = None
+
+# kinds are mapped to small ints; the kernel compares raw bytes against a
+# padded keyword table instead of strings
+_KINDS = tuple(_DIRECTIVE_CHECKS)
+_KIND_IDS = {kw: i for i, kw in enumerate(_KINDS)}
+
+def validate_directives_bulk(raws: Sequence[str], kinds: Sequence[str]) -> list[bool]:
+    """
+    Check many (raw, kind) pairs at once: result[i] is True iff raws[i] is a
+    '#<kinds[i]>' directive line, i.e. DirectiveNode / ConditionalBranch would
+    accept it for that kind. Unknown kinds are reported as False.
+    """
+    if len(raws) != len(kinds):
+        raise ValueError(f"raws and kinds differ in length: {len(raws)} != {len(kinds)}")
+    if njit is None or not raws:
+        return _validate_py(raws, kinds)
+
+    buf, offsets = _encode(raws)
+    kind_ids = np.fromiter((_KIND_IDS.get(k, -1) for k in kinds), dtype=np.int64, count=len(kinds))
+    return _validate_kernel(buf, offsets, kind_ids, _KW_TABLE, _KW_LENS).tolist()
+
+def _validate_py(raws: Sequence[str], kinds: Sequence[str]) -> list[bool]:
+    out = []
+    for raw, kind in zip(raws, kinds):
+        check = _DIRECTIVE_CHECKS.get(kind)
+        try:
+            ok = check is not None and bool(raw.strip())
+            if ok:
+                check(raw)
+        except ValueError:
+            ok = False
+        out.append(ok)
+    return out
+
+# -----------------------
+# compiled path
+# -----------------------
+# Kept at module scope so numba's on-disk cache key is stable across sessions.
+
+if njit is not None:
+    _KW_LENS = np.array([len(kw) for kw in _KINDS], dtype=np.int64)
+    _KW_TABLE = np.zeros((len(_KINDS), int(_KW_LENS.max())), dtype=np.uint8)
+    for _i, _kw in enumerate(_KINDS):
+        _KW_TABLE[_i, :len(_kw)] = np.frombuffer(_kw.encode("ascii"), dtype=np.uint8)
+    del _i, _kw
+
+    def _encode(raws: Sequence[str]):
+        """Flatten raws into one uint8 buffer plus (n + 1) byte offsets."""
+        joined = "".join(raws)
+        if joined.isascii():
+            lengths = np.fromiter(map(len, raws), dtype=np.int64, count=len(raws))
+            data = joined.encode("ascii")
+        else:
+            parts = [r.encode("utf-8") for r in raws]
+            lengths = np.fromiter(map(len, parts), dtype=np.int64, count=len(parts))
+            data = b"".join(parts)
+        offsets = np.zeros(len(raws) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return np.frombuffer(data, dtype=np.uint8), offsets
+
+    @njit(cache=True)
+    def _is_space(c):
+        return c == 32 or (9 <= c <= 13)
+
+    @njit(cache=True)
+    def _is_ident_byte(c):
+        return (48 <= c <= 57) or (65 <= c <= 90) or (97 <= c <= 122) or c == 95
+
+    @njit(cache=True)
+    def _validate_kernel(buf, offsets, kind_ids, kw_table, kw_lens):
+        n = kind_ids.shape[0]
+        out = np.zeros(n, dtype=np.bool_)
+        for r in range(n):
+            k = kind_ids[r]
+            if k < 0:
+                continue
+            i = offsets[r]
+            end = offsets[r + 1]
+            # leading spaces, '#', spaces
+            while i < end and _is_space(buf[i]):
+                i += 1
+            if i >= end or buf[i] != 35:
+                continue
+            i += 1
+            while i < end and _is_space(buf[i]):
+                i += 1
+            # keyword, then a word break
+            klen = kw_lens[k]
+            if end - i < klen:
+                continue
+            ok = True
+            for j in range(klen):
+                if buf[i + j] != kw_table[k, j]:
+                    ok = False
+                    break
+            if ok and (i + klen == end or not _is_ident_byte(buf[i + klen])):
+                out[r] = True
+        return out
@@ -1,104 +1,259 @@
 from __future__ import annotations
-from typing import Literal, Union, Optional
-from pydantic import BaseModel, Field, model_validator, ConfigDict
-from __future__ import annotations
 
-import re
-from typing import Literal, Union, Optional
-from pydantic import BaseModel, Field, model_validator
+import sys
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, Literal
+
+# When True, make_trusted() skips __post_init__ validation for nodes coming
+# from a parser that already guarantees well-formedness. Off by default so
+# tests go through the validating path.
+TRUST_INPUTS = False
 
 # -----------------------
 # helpers (pure functions)
 # -----------------------
-_C_IDENT_PREFIX = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*")
-_C_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_KW_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_")
+_CONDITIONAL_KWS = frozenset(("if", "ifdef", "ifndef", "elif", "else", "endif"))
+# '#if' also covers '#ifdef' / '#ifndef'; one C-level startswith over the tuple
+_CONDITIONAL_PREFIXES = ("#if", "#elif", "#else", "#endif")
+
+_SPACES = frozenset(" \t\f\v\r\n")
 
-def _strip_hash_prefix(raw: str) -> str:
+def _skip_hash_prefix(raw: str) -> int:
+    """
+    Return the index just past '#' and the spaces after it. Pure index scan:
+    no stripped/sliced copies of raw are made on the happy path.
+    """
+    i, n = 0, len(raw)
     # normalize: allow leading spaces, require '#'
-    s = raw.lstrip()
-    if not s.startswith("#"):
+    while i < n and raw[i] in _SPACES:
+        i += 1
+    if i >= n or raw[i] != "#":
         raise ValueError(f"directive raw must start with '#': {raw!r}")
-    return s
+    i += 1
+    while i < n and raw[i] in _SPACES:
+        i += 1
+    return i
+
+def _directive_keyword(raw: str) -> str:
+    """Return the directive keyword following '#' ('' if there is none)."""
+    start = _skip_hash_prefix(raw)
+    # keywords are short; scanning a bounded prefix is cheaper than a regex match
+    i, n = start, min(len(raw), start + 32)
+    while i < n and raw[i] in _KW_CHARS:
+        i += 1
+    return raw[start:i]
 
 def _expect_directive(raw: str, expected: str) -> None:
     """
     expected: 'if'|'ifdef'|'ifndef'|'elif'|'include'|'define'|'undef'|'pragma'|'error'
     Accepts forms like '# if', '#if', '#   ifdef', etc.
     """
-    s = _strip_hash_prefix(raw)[1:].lstrip()   # drop '#', strip spaces
-    m = _C_IDENT_PREFIX.match(s)
-    # directive keyword is the first token after '#'
-    kw =  m.group(0) if m else ""
-    if kw != expected:
-        raise ValueError(f"raw directive keyword mismatch: expected #{expected}, got #{kw} in {raw!r}")
+    i = _skip_hash_prefix(raw)
+    end = i + len(expected)
+    if raw.startswith(expected, i) and (end == len(raw) or raw[end] not in _KW_CHARS):
+        return
+    kw = _directive_keyword(raw)
+    raise ValueError(f"raw directive keyword mismatch: expected #{expected}, got #{kw} in {raw!r}")
+
+# Memoized (raw, expected) check for the slow path of the per-kind checks;
+# only successful checks are cached, mismatches raise every time.
+_expect_directive_cached = lru_cache(maxsize=512)(_expect_directive)
 
 def _require_nonempty_condition(cond: str, *, where: str) -> None:
     if cond is None or cond.strip() == "":
         raise ValueError(f"{where}: condition must be non-empty")
 
+# ifdef/ifndef conditions repeat heavily (__cplusplus, _WIN32, NDEBUG, ...)
+@lru_cache(maxsize=4096)
+def _is_c_ident(s: str) -> bool:
+    # for ASCII, Python identifiers are exactly [A-Za-z_][A-Za-z0-9_]*; both
+    # checks run in C without building a regex Match object
+    s = s.strip()
+    return s.isascii() and s.isidentifier()
+
 def _require_identifier(cond: str, *, where: str) -> None:
     _require_nonempty_condition(cond, where=where)
-    c = cond.strip()
-    if not _C_IDENT.match(c):
+    if not _is_c_ident(cond):
         raise ValueError(f"{where}: expected C identifier for ifdef/ifndef condition, got {cond!r}")
 
+def _require_kind(kind: str, allowed: tuple[str, ...], *, where: str) -> None:
+    # stands in for the Literal[...] check pydantic used to do for us
+    if kind not in allowed:
+        raise ValueError(f"{where}.kind must be one of {'/'.join(allowed)}, got {kind!r}")
+
+def _require_str(value, *, where: str) -> None:
+    # stands in for pydantic's str field validation
+    if type(value) is not str:
+        raise ValueError(f"{where} must be a str, got {type(value).__name__}")
+
+def _require_nodes(items: tuple, *, where: str) -> None:
+    # stands in for pydantic's element validation of tuple[Node, ...] fields
+    for i, it in enumerate(items):
+        if not isinstance(it, _NODE_TYPES):
+            raise ValueError(f"{where}[{i}] must be a TextBlock/DirectiveNode/ConditionalGroup, got {type(it).__name__}")
+
+# Directive lines like '#endif' / '#else' / '#pragma once' repeat across a
+# codebase; interning them lets every node share one string object.
+_INTERN_MAX_LEN = 64
+
+def _intern(s):
+    if type(s) is str and len(s) <= _INTERN_MAX_LEN:
+        return sys.intern(s)
+    return s
+
+def _intern_field(node, name: str) -> None:
+    object.__setattr__(node, name, _intern(getattr(node, name)))
+
+def _freeze(value):
+    # sequence fields are tuples; accept lists from callers and freeze them
+    return tuple(value) if type(value) is list else value
+
+def _freeze_field(node, name: str) -> None:
+    object.__setattr__(node, name, _freeze(getattr(node, name)))
+
+_DIRECTIVE_KINDS = ("include", "define", "undef", "pragma", "error")
+_BRANCH_KINDS = ("if", "ifdef", "ifndef", "elif")
+
+def _make_directive_check(kw: str) -> Callable[[str], None]:
+    """
+    Specialize _expect_directive for one keyword: the common '#kw' / '# kw'
+    spellings are accepted with a constant-prefix startswith plus a word-break
+    check; anything else (leading or odd spacing, mismatch) takes the generic
+    path.
+    """
+    tight, spaced = "#" + kw, "# " + kw
+    n_tight, n_spaced = len(tight), len(spaced)
+
+    def _check(raw: str) -> None:
+        if raw.startswith(tight):
+            end = n_tight
+        elif raw.startswith(spaced):
+            end = n_spaced
+        else:
+            end = 0
+        if end and (len(raw) == end or raw[end] not in _KW_CHARS):
+            return
+        _expect_directive_cached(raw, kw)
+
+    _check.__name__ = f"_check_{kw}"
+    return _check
+
+_DIRECTIVE_CHECKS: dict[str, Callable[[str], None]] = {
+    kw: _make_directive_check(kw) for kw in _DIRECTIVE_KINDS + _BRANCH_KINDS
+}
+
 # -----------------------
 # models
 # -----------------------
+# Plain frozen, slotted dataclasses: the nodes are internal AST containers, so
+# validation is done explicitly in __post_init__ instead of through pydantic.
+# kw_only keeps the keyword-only construction the pydantic models had.
+
+class _NodeBase:
+    # hash cache, filled on first __hash__ (see _cached_hash). A bare slot
+    # rather than a dataclass field, so it stays out of fields(), asdict(),
+    # pickling and copies (a string hash is only valid in its own process).
+    __slots__ = ("_hash",)
+
+    # Each node class has a make_trusted() classmethod that builds it from
+    # trusted (parser-produced) fields, skipping validation when TRUST_INPUTS
+    # is set. They take explicit keywords and write the slots directly through
+    # the member descriptors (cheaper than object.__setattr__, and it bypasses
+    # the frozen-dataclass guard), otherwise the trusted path ends up slower
+    # than the validating constructor.
 
-class TextBlock(BaseModel):
+    def _freeze_sequences(self) -> None:
+        pass
+
+    def _intern_strings(self) -> None:
+        pass
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class TextBlock(_NodeBase):
     kind: Literal["text"] = "text"
     content: str
-    
-    model_config = ConfigDict(frozen=True)
 
-    @model_validator(mode="after")
-    def _validate_text(self) -> "TextBlock":
+    def __post_init__(self) -> None:
+        _require_kind(self.kind, ("text",), where="TextBlock")
         # allow empty text blocks if you want; disallow if not
-        if self.content is None:
-            raise ValueError("TextBlock.content must not be None")
-        return self
+        _require_str(self.content, where="TextBlock.content")
+
+    @classmethod
+    def make_trusted(cls, *, kind: str = "text", content: str) -> "TextBlock":
+        if not TRUST_INPUTS:
+            return cls(kind=kind, content=content)
+        if kind != "text":
+            _require_kind(kind, ("text",), where="TextBlock")
+        node = object.__new__(cls)
+        _text_set_kind(node, kind)
+        _text_set_content(node, content)
+        return node
+
 
+_text_set_kind = TextBlock.kind.__set__
+_text_set_content = TextBlock.content.__set__
 
-class DirectiveNode(BaseModel):
+@dataclass(frozen=True, slots=True, kw_only=True)
+class DirectiveNode(_NodeBase):
     """Generic directive node for include, define, undef, error, pragma, etc."""
     kind: Literal["include", "define", "undef", "pragma", "error"]
     raw: str  # Original raw line
 
-    model_config = ConfigDict(frozen=True)
-
-    @model_validator(mode="after")
-    def _validate_directive(self) -> "DirectiveNode":
-        if self.raw is None or self.raw.strip() == "":
+    def __post_init__(self) -> None:
+        _require_kind(self.kind, _DIRECTIVE_KINDS, where="DirectiveNode")
+        _require_str(self.raw, where="DirectiveNode.raw")
+        if self.raw.strip() == "":
             raise ValueError("DirectiveNode.raw must be non-empty")
 
         # enforce that raw matches kind (Legality: structural consistency)
-        _expect_directive(self.raw, self.kind)
+        _DIRECTIVE_CHECKS[self.kind](self.raw)
+
+        self._intern_strings()
+
+    @classmethod
+    def make_trusted(cls, *, kind: str, raw: str) -> "DirectiveNode":
+        if not TRUST_INPUTS:
+            return cls(kind=kind, raw=raw)
+        # the one check we keep: a mislabelled raw line would print wrong
+        # (the kind guard also keeps branch kinds like 'if' out of here)
+        _require_kind(kind, _DIRECTIVE_KINDS, where="DirectiveNode")
+        _DIRECTIVE_CHECKS[kind](raw)
+        node = object.__new__(cls)
+        _directive_set_kind(node, kind)
+        _directive_set_raw(node, _intern(raw))
+        return node
 
-        return self
+    def _intern_strings(self) -> None:
+        _intern_field(self, "raw")
 
 
-# forward-declare Node for type checking in pydantic models
-Node = Union["TextBlock", "DirectiveNode", "ConditionalGroup"]
+_directive_set_kind = DirectiveNode.kind.__set__
+_directive_set_raw = DirectiveNode.raw.__set__
 
 
-class ConditionalBranch(BaseModel):
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ConditionalBranch(_NodeBase):
     """Represents a branch of #if / #ifdef / #ifndef / #elif"""
     kind: Literal["if", "ifdef", "ifndef", "elif"]
     condition: str
-    body: list[Node]
+    body: tuple[Node, ...]
     raw: str  # '#if CONDITION'
 
-    model_config = ConfigDict(frozen=True)
+    def __post_init__(self) -> None:
+        _require_kind(self.kind, _BRANCH_KINDS, where="ConditionalBranch")
 
-    @model_validator(mode="after")
-    def _validate_branch(self) -> "ConditionalBranch":
         # raw basic
-        if self.raw is None or self.raw.strip() == "":
+        _require_str(self.raw, where="ConditionalBranch.raw")
+        _require_str(self.condition, where="ConditionalBranch.condition")
+        if self.raw.strip() == "":
             raise ValueError("ConditionalBranch.raw must be non-empty")
 
         # raw directive keyword must match kind
-        _expect_directive(self.raw, self.kind)
+        _DIRECTIVE_CHECKS[self.kind](self.raw)
 
         # condition legality by kind
         if self.kind in ("if", "elif"):
@@ -109,34 +264,79 @@ class ConditionalBranch(BaseModel):
         # body must exist (can be empty, but not None)
         if self.body is None:
             raise ValueError("ConditionalBranch.body must not be None")
-
-        return self
-
-class ConditionalGroup(BaseModel):
+        self._freeze_sequences()
+        if not isinstance(self.body, tuple):
+            raise ValueError("ConditionalBranch.body must be a tuple")
+        _require_nodes(self.body, where="ConditionalBranch.body")
+
+        self._intern_strings()
+
+    @classmethod
+    def make_trusted(cls, *, kind: str, condition: str, body: tuple[Node, ...], raw: str) -> "ConditionalBranch":
+        if not TRUST_INPUTS:
+            return cls(kind=kind, condition=condition, body=body, raw=raw)
+        # same kept checks as DirectiveNode.make_trusted
+        _require_kind(kind, _BRANCH_KINDS, where="ConditionalBranch")
+        _DIRECTIVE_CHECKS[kind](raw)
+        node = object.__new__(cls)
+        _branch_set_kind(node, kind)
+        _branch_set_condition(node, _intern(condition) if kind in ("ifdef", "ifndef") else condition)
+        _branch_set_body(node, _freeze(body))
+        _branch_set_raw(node, _intern(raw))
+        return node
+
+    def _freeze_sequences(self) -> None:
+        _freeze_field(self, "body")
+
+    def _intern_strings(self) -> None:
+        _intern_field(self, "raw")
+        # ifdef/ifndef conditions are identifiers (__cplusplus, NDEBUG, ...)
+        if self.kind in ("ifdef", "ifndef"):
+            _intern_field(self, "condition")
+
+
+_branch_set_kind = ConditionalBranch.kind.__set__
+_branch_set_condition = ConditionalBranch.condition.__set__
+_branch_set_body = ConditionalBranch.body.__set__
+_branch_set_raw = ConditionalBranch.raw.__set__
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ConditionalGroup(_NodeBase):
     kind: Literal["conditional_group"] = "conditional_group"
     entry: ConditionalBranch
-    elifs: Optional[list[ConditionalBranch]] = None
-    else_body: Optional[list[Node]] = None
-    else_raw: Optional[str] = None
+    elifs: tuple[ConditionalBranch, ...] = ()
+    else_body: tuple[Node, ...] = ()
+    else_raw: str = ""  # '' means there is no #else clause
     endif_raw: str = "#endif"
 
-    model_config = ConfigDict(frozen=True)
+    def __post_init__(self) -> None:
+        _require_kind(self.kind, ("conditional_group",), where="ConditionalGroup")
 
-    @model_validator(mode="after")
-    def _validate_group(self) -> "ConditionalGroup":
         # 1) entry must be an opening branch (Legality: cannot be elif)
+        if not isinstance(self.entry, ConditionalBranch):
+            raise ValueError(f"ConditionalGroup.entry must be a ConditionalBranch, got {type(self.entry).__name__}")
         if self.entry.kind not in ("if", "ifdef", "ifndef"):
             raise ValueError(f"ConditionalGroup.entry.kind must be one of if/ifdef/ifndef, got {self.entry.kind!r}")
 
-        # 2) elifs must all be kind='elif' if present (Legality: cannot be if/ifdef/ifndef)
-        if self.elifs is not None:
-            for i, b in enumerate(self.elifs):
-                if b.kind != "elif":
-                    raise ValueError(f"ConditionalGroup.elifs[{i}].kind must be 'elif', got {b.kind!r}")
-
-        # 3) else_body exists => it's a list (can be empty) and must not be None
-        if self.else_body is not None and not isinstance(self.else_body, list):
-            raise ValueError("ConditionalGroup.else_body must be a list when provided")
+        self._freeze_sequences()
+
+        # 2) elifs must all be kind='elif' (Legality: cannot be if/ifdef/ifndef)
+        if not isinstance(self.elifs, tuple):
+            raise ValueError("ConditionalGroup.elifs must be a tuple")
+        for i, b in enumerate(self.elifs):
+            if not isinstance(b, ConditionalBranch):
+                raise ValueError(f"ConditionalGroup.elifs[{i}] must be a ConditionalBranch, got {type(b).__name__}")
+            if b.kind != "elif":
+                raise ValueError(f"ConditionalGroup.elifs[{i}].kind must be 'elif', got {b.kind!r}")
+
+        # 3) else_body is a tuple (can be empty); a non-empty one needs its '#else' line
+        if not isinstance(self.else_body, tuple):
+            raise ValueError("ConditionalGroup.else_body must be a tuple")
+        _require_nodes(self.else_body, where="ConditionalGroup.else_body")
+        _require_str(self.else_raw, where="ConditionalGroup.else_raw (use '' for no #else)")
+        _require_str(self.endif_raw, where="ConditionalGroup.endif_raw")
+        if self.else_body and not self.else_raw:
+            raise ValueError("ConditionalGroup.else_raw is required when else_body is non-empty")
 
         # 4) (optional but very useful) forbid nested elif inside entry/elif bodies as raw directives
         # You said you require ConditionalGroup合法; a common footgun is letting stray '#elif/#else/#endif'
@@ -145,59 +345,190 @@ class ConditionalGroup(BaseModel):
         # Since DirectiveNode.kind doesn't include those, they would have to sneak in as TextBlock content or malformed DirectiveNode.raw.
         # We can cheaply guard: no body item may be a ConditionalBranch / raw conditional directive.
         # (Your schema doesn't allow those directly, so this is mostly a sanity check.)
-        def _walk(nodes: list[Node]) -> None:
-            for n in nodes:
-                if isinstance(n, DirectiveNode):
-                    # ensure it isn't a conditional keyword disguised
-                    s = _strip_hash_prefix(n.raw)[1:].lstrip()
-                    kw = s.split(None, 1)[0] if s else ""
-                    if kw in ("if", "ifdef", "ifndef", "elif", "else", "endif"):
-                        raise ValueError(f"Illegal conditional directive inside body as DirectiveNode: {n.raw!r}")
-                elif isinstance(n, ConditionalGroup):
-                    # nested groups are fine
-                    continue
-                elif isinstance(n, TextBlock):
-                    # If you want to disallow stray '#elif/#else/#endif' inside text blocks,
-                    # you need tokenization; string check would be too fragile. So we don't.
-                    continue
-                else:
-                    raise ValueError(f"Unknown node type in body: {type(n)}")
-
-        _walk(self.entry.body)
-        if self.elifs:
-            for b in self.elifs:
-                _walk(b.body)
-        if self.else_body is not None:
-            _walk(self.else_body)
-
-        return self
-
-
-class FileRoot(BaseModel):
+        # All branch bodies are checked in a single pass.
+        _DirectiveNode, _ConditionalGroup, _TextBlock = DirectiveNode, ConditionalGroup, TextBlock
+        for n in chain(self.entry.body, *(b.body for b in self.elifs), self.else_body):
+            if isinstance(n, _DirectiveNode):
+                # ensure it isn't a conditional keyword disguised; only the
+                # tight '#kw' spellings and spaced or indented forms need the full scan
+                raw = n.raw
+                if ((raw.startswith(_CONDITIONAL_PREFIXES) or raw[:1] != "#" or raw[1:2].isspace())
+                        and _directive_keyword(raw) in _CONDITIONAL_KWS):
+                    raise ValueError(f"Illegal conditional directive inside body as DirectiveNode: {n.raw!r}")
+            elif isinstance(n, (_ConditionalGroup, _TextBlock)):
+                # nested groups are fine.
+                # If you want to disallow stray '#elif/#else/#endif' inside text blocks,
+                # you need tokenization; string check would be too fragile. So we don't.
+                continue
+            else:
+                raise ValueError(f"Unknown node type in body: {type(n)}")
+
+        self._intern_strings()
+
+    @classmethod
+    def make_trusted(
+        cls,
+        *,
+        kind: str = "conditional_group",
+        entry: ConditionalBranch,
+        elifs: tuple[ConditionalBranch, ...] = (),
+        else_body: tuple[Node, ...] = (),
+        else_raw: str = "",
+        endif_raw: str = "#endif",
+    ) -> "ConditionalGroup":
+        if not TRUST_INPUTS:
+            return cls(kind=kind, entry=entry, elifs=elifs, else_body=else_body,
+                       else_raw=else_raw, endif_raw=endif_raw)
+        if kind != "conditional_group":
+            _require_kind(kind, ("conditional_group",), where="ConditionalGroup")
+        # cheap, and without it tostring() would drop the else body silently
+        if else_body and not else_raw:
+            raise ValueError("ConditionalGroup.else_raw is required when else_body is non-empty")
+        node = object.__new__(cls)
+        _group_set_kind(node, kind)
+        _group_set_entry(node, entry)
+        _group_set_elifs(node, _freeze(elifs))
+        _group_set_else_body(node, _freeze(else_body))
+        _group_set_else_raw(node, _intern(else_raw))
+        _group_set_endif_raw(node, _intern(endif_raw))
+        return node
+
+    def _freeze_sequences(self) -> None:
+        _freeze_field(self, "elifs")
+        _freeze_field(self, "else_body")
+
+    def _intern_strings(self) -> None:
+        _intern_field(self, "else_raw")
+        _intern_field(self, "endif_raw")
+
+
+_group_set_kind = ConditionalGroup.kind.__set__
+_group_set_entry = ConditionalGroup.entry.__set__
+_group_set_elifs = ConditionalGroup.elifs.__set__
+_group_set_else_body = ConditionalGroup.else_body.__set__
+_group_set_else_raw = ConditionalGroup.else_raw.__set__
+_group_set_endif_raw = ConditionalGroup.endif_raw.__set__
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class FileRoot(_NodeBase):
     path: str
-    items: list[Node]
-
-    model_config = ConfigDict(frozen=True)
+    items: tuple[Node, ...]
 
-    @model_validator(mode="after")
-    def _validate_root(self) -> "FileRoot":
-        if self.path is None or self.path.strip() == "":
+    def __post_init__(self) -> None:
+        _require_str(self.path, where="FileRoot.path")
+        if self.path.strip() == "":
             raise ValueError("FileRoot.path must be non-empty")
 
         if self.items is None:
             raise ValueError("FileRoot.items must not be None")
+        self._freeze_sequences()
+        if not isinstance(self.items, tuple):
+            raise ValueError("FileRoot.items must be a tuple")
+
+        _require_nodes(self.items, where="FileRoot.items")
+
+    @classmethod
+    def make_trusted(cls, *, path: str, items: tuple[Node, ...]) -> "FileRoot":
+        if not TRUST_INPUTS:
+            return cls(path=path, items=items)
+        node = object.__new__(cls)
+        _root_set_path(node, path)
+        _root_set_items(node, _freeze(items))
+        return node
+
+    def _freeze_sequences(self) -> None:
+        _freeze_field(self, "items")
 
-        # (optional) normalize: forbid None items
-        for i, it in enumerate(self.items):
-            if it is None:
-                raise ValueError(f"FileRoot.items[{i}] is None")
 
-        return self
+_root_set_path = FileRoot.path.__set__
+_root_set_items = FileRoot.items.__set__
 
 
-# update forward refs for Node
-TextBlock.model_rebuild()
-DirectiveNode.model_rebuild()
-ConditionalBranch.model_rebuild()
-ConditionalGroup.model_rebuild()
-FileRoot.model_rebuild()
+Node = TextBlock | DirectiveNode | ConditionalGroup
+_NODE_TYPES = (TextBlock, DirectiveNode, ConditionalGroup)
+
+
+# -----------------------
+# hashing
+# -----------------------
+# Nodes hash by value so identical subtrees (include guards, '#pragma once'
+# blocks, ...) can be deduplicated through a dict, see core.intern.intern_tree.
+# Sequence fields are frozen to tuples at construction, so the hash can be
+# computed once and cached in the _hash slot.
+
+@lru_cache(maxsize=None)
+def _compare_fields(cls: type) -> tuple[str, ...]:
+    return tuple(f.name for f in fields(cls) if f.compare)
+
+# fields that hold child nodes (directly or in a tuple); leaves have none
+_CHILD_FIELDS: dict[type, tuple[str, ...]] = {
+    ConditionalBranch: ("body",),
+    ConditionalGroup: ("entry", "elifs", "else_body"),
+    FileRoot: ("items",),
+}
+
+def _store_hash(node: _NodeBase) -> None:
+    if not hasattr(node, "_hash"):
+        h = hash(tuple(map(node.__getattribute__, _compare_fields(type(node)))))
+        object.__setattr__(node, "_hash", h)
+
+def _cached_hash(self: _NodeBase) -> int:
+    try:
+        return self._hash
+    except AttributeError:  # slot not filled yet
+        pass
+    child_fields = _CHILD_FIELDS.get(type(self))
+    if child_fields is not None:
+        # hash unhashed descendants bottom-up first (reversed pre-order), so
+        # hashing a node only reads cached child hashes and deep trees don't
+        # recurse
+        pending, stack = [], [self]
+        while stack:
+            n = stack.pop()
+            pending.append(n)
+            for name in _CHILD_FIELDS.get(type(n), ()):
+                value = getattr(n, name)
+                for c in (value if type(value) is tuple else (value,)):
+                    if not hasattr(c, "_hash"):
+                        stack.append(c)
+        for n in reversed(pending):
+            _store_hash(n)
+    else:
+        _store_hash(self)
+    return self._hash
+
+def _node_eq(self: _NodeBase, other: object) -> bool:
+    # field-by-field like the generated __eq__, but child nodes are compared
+    # through an explicit stack so deep trees don't recurse
+    if self is other:
+        return True
+    if type(other) is not type(self):
+        return NotImplemented
+    stack = [(self, other)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        cls = type(a)
+        if type(b) is not cls:
+            return False
+        child_fields = _CHILD_FIELDS.get(cls, ())
+        for name in _compare_fields(cls):
+            x, y = getattr(a, name), getattr(b, name)
+            if name not in child_fields:
+                if x != y:
+                    return False
+            elif type(x) is tuple:
+                if type(y) is not tuple or len(x) != len(y):
+                    return False
+                stack.extend(zip(x, y))
+            else:
+                stack.append((x, y))
+    return True
+
+# dataclass(frozen=True) generates a field-tuple __hash__ and a recursive
+# __eq__ per class, so override them after the fact
+for _cls in (TextBlock, DirectiveNode, ConditionalBranch, ConditionalGroup, FileRoot):
+    _cls.__hash__ = _cached_hash
+    _cls.__eq__ = _node_eq
+del _cls
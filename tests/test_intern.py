@@ -0,0 +1,78 @@
+import copy
+import dataclasses
+import pickle
+
+from cpptree.core.intern import intern_tree
+from cpptree.core.tostring import tostring
+from cpptree.models import ConditionalBranch, ConditionalGroup, DirectiveNode, FileRoot, TextBlock
+
+
+def _guard():
+    return ConditionalGroup(
+        entry=ConditionalBranch(
+            kind="ifndef",
+            condition="GUARD_H",
+            body=[DirectiveNode(kind="define", raw="#define GUARD_H"), TextBlock(content="int x;\n")],
+            raw="#ifndef GUARD_H",
+        ),
+    )
+
+
+def test_identical_subtrees_share_one_instance():
+    first, second = _guard(), _guard()
+    assert first == second and first is not second
+    table = {}
+    assert intern_tree(first, table) is first
+    assert intern_tree(second, table) is first
+
+
+def test_parents_are_rebuilt_around_canonical_children():
+    canonical = intern_tree(_guard(), table := {})
+    top = ConditionalGroup(
+        entry=ConditionalBranch(kind="if", condition="1", body=[_guard(), _guard()], raw="#if 1"),
+        else_body=[_guard()],
+        else_raw="#else",
+    )
+    result = intern_tree(top, table)
+    assert result == top
+    assert result.entry.body[0] is canonical
+    assert result.entry.body[1] is canonical
+    assert result.else_body[0] is canonical
+    assert tostring(result) == tostring(top)
+
+
+def test_file_roots_are_interned():
+    table = {}
+    first = intern_tree(FileRoot(path="a.h", items=[_guard(), TextBlock(content="x\n")]), table)
+    second = intern_tree(FileRoot(path="b.h", items=[_guard()]), table)
+    assert second.items[0] is first.items[0]
+    assert intern_tree(FileRoot(path="a.h", items=[_guard(), TextBlock(content="x\n")]), table) is first
+
+
+def _deep(depth, content="x"):
+    nodes = (TextBlock(content=content),)
+    for _ in range(depth):
+        nodes = (ConditionalGroup(entry=ConditionalBranch(kind="if", condition="1", body=nodes, raw="#if 1")),)
+    return nodes[0]
+
+
+def test_deep_trees():
+    table = {}
+    first = intern_tree(_deep(5000), table)
+    assert intern_tree(_deep(5000), table) is first
+
+
+def test_deep_trees_compare_without_recursion():
+    assert _deep(5000) == _deep(5000)
+    assert _deep(5000) != _deep(5000, content="y")
+    assert _deep(5000) != _deep(4999)
+
+
+def test_hash_cache_is_not_a_field():
+    node = DirectiveNode(kind="define", raw="#define X")
+    hash(node)
+    assert [f.name for f in dataclasses.fields(node)] == ["kind", "raw"]
+    assert dataclasses.asdict(node) == {"kind": "define", "raw": "#define X"}
+    loaded = pickle.loads(pickle.dumps(node))
+    assert loaded == node and hash(loaded) == hash(node)
+    assert copy.copy(node) in {node}
@@ -0,0 +1,153 @@
+import pytest
+
+from cpptree.models import (
+    ConditionalBranch,
+    ConditionalGroup,
+    DirectiveNode,
+    FileRoot,
+    TextBlock,
+)
+
+
+def _branch(kind="if", condition="1", body=(), raw=None):
+    return ConditionalBranch(kind=kind, condition=condition, body=body, raw=raw or f"#{kind} {condition}")
+
+
+@pytest.mark.parametrize("kind, raw", [
+    ("define", "#define X 1"),
+    ("define", "# define X"),
+    ("define", " #define X"),
+    ("define", "#\tdefine X"),
+    ("include", "#include <a.h>"),
+    ("include", '#include"a.h"'),
+    ("pragma", "#pragma once"),
+    ("undef", "#undef X"),
+    ("error", "#error"),
+])
+def test_directive_accepts_raw_spellings(kind, raw):
+    assert DirectiveNode(kind=kind, raw=raw).raw == raw
+
+
+@pytest.mark.parametrize("kind, raw", [
+    ("define", "#definex"),
+    ("define", "#undef X"),
+    ("define", "define X"),
+    ("define", "#"),
+    ("define", "   "),
+    ("pragma", "#endif//x"),
+])
+def test_directive_rejects_raw_spellings(kind, raw):
+    with pytest.raises(ValueError):
+        DirectiveNode(kind=kind, raw=raw)
+
+
+@pytest.mark.parametrize("kind", ["if", "elif", "endif", "text", "bogus"])
+def test_directive_rejects_non_directive_kinds(kind):
+    with pytest.raises(ValueError):
+        DirectiveNode(kind=kind, raw=f"#{kind} X")
+
+
+@pytest.mark.parametrize("raw", ["#ifdef X", "#  ifdef X", " # ifdef X", "#ifdef\tX"])
+def test_branch_accepts_raw_spellings(raw):
+    assert ConditionalBranch(kind="ifdef", condition="X", body=(), raw=raw).raw == raw
+
+
+@pytest.mark.parametrize("raw", ["#ifdefX", "#ifndef X", "#if X", "ifdef X"])
+def test_branch_rejects_raw_spellings(raw):
+    with pytest.raises(ValueError):
+        ConditionalBranch(kind="ifdef", condition="X", body=(), raw=raw)
+
+
+@pytest.mark.parametrize("condition", ["X", "_X1", "__cplusplus", " NDEBUG ", "\tFOO\n"])
+def test_ifdef_accepts_identifiers(condition):
+    for kind in ("ifdef", "ifndef"):
+        _branch(kind=kind, condition=condition, raw=f"#{kind} X")
+
+
+@pytest.mark.parametrize("condition", ["", "   ", "1X", "X Y", "X-Y", "défini", "名前", "X()"])
+def test_ifdef_rejects_non_identifiers(condition):
+    for kind in ("ifdef", "ifndef"):
+        with pytest.raises(ValueError):
+            _branch(kind=kind, condition=condition, raw=f"#{kind} X")
+
+
+def test_if_needs_a_condition_but_not_an_identifier():
+    assert _branch(kind="if", condition="defined(X) && Y > 1").condition == "defined(X) && Y > 1"
+    with pytest.raises(ValueError):
+        _branch(kind="if", condition=" ")
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(kind="if", condition=1, body=(), raw="#if 1"),
+    dict(kind="if", condition="1", body=(), raw=None),
+    dict(kind="if", condition="1", body=None, raw="#if 1"),
+    dict(kind="if", condition="1", body=["x"], raw="#if 1"),
+])
+def test_branch_rejects_bad_field_types(kwargs):
+    with pytest.raises(ValueError):
+        ConditionalBranch(**kwargs)
+
+
+def test_sequences_are_frozen_to_tuples():
+    text = TextBlock(content="x\n")
+    branch = _branch(body=[text])
+    group = ConditionalGroup(entry=branch, elifs=[_branch(kind="elif")], else_body=[text], else_raw="#else")
+    root = FileRoot(path="a.h", items=[group])
+    assert branch.body == (text,)
+    assert type(group.elifs) is tuple and group.else_body == (text,)
+    assert root.items == (group,)
+
+
+def test_group_entry_must_open_the_group():
+    with pytest.raises(ValueError):
+        ConditionalGroup(entry=_branch(kind="elif"))
+    with pytest.raises(ValueError):
+        ConditionalGroup(entry="#if 1")
+
+
+@pytest.mark.parametrize("elifs", [[_branch(kind="if")], [_branch(kind="ifdef", condition="X")], [None]])
+def test_group_elifs_must_be_elif_branches(elifs):
+    with pytest.raises(ValueError):
+        ConditionalGroup(entry=_branch(), elifs=elifs)
+
+
+def test_group_else_rules():
+    body = [TextBlock(content="y\n")]
+    # an empty #else clause is fine, a non-empty one needs its '#else' line
+    assert ConditionalGroup(entry=_branch(), else_raw="#else").else_body == ()
+    assert ConditionalGroup(entry=_branch(), else_body=body, else_raw="#else").else_raw == "#else"
+    with pytest.raises(ValueError):
+        ConditionalGroup(entry=_branch(), else_body=body)
+    with pytest.raises(ValueError):
+        ConditionalGroup(entry=_branch(), else_body=body, else_raw=None)
+    with pytest.raises(ValueError):
+        ConditionalGroup(entry=_branch(), else_body=[1], else_raw="#else")
+
+
+@pytest.mark.parametrize("raw", ["#endif", "#else", "# elif X", "  #if 1", "#endif//x", "#ifdef X"])
+def test_group_rejects_conditional_keyword_in_body(raw):
+    # a validated DirectiveNode can't carry these; build one that slipped through
+    disguised = object.__new__(DirectiveNode)
+    object.__setattr__(disguised, "kind", "pragma")
+    object.__setattr__(disguised, "raw", raw)
+    for group in (
+        lambda: ConditionalGroup(entry=_branch(body=[disguised])),
+        lambda: ConditionalGroup(entry=_branch(), elifs=[_branch(kind="elif", body=[disguised])]),
+        lambda: ConditionalGroup(entry=_branch(), else_body=[disguised], else_raw="#else"),
+    ):
+        with pytest.raises(ValueError):
+            group()
+
+
+@pytest.mark.parametrize("raw", ["#include <if.h>", "#pragma endif", "#define ifdef 1", "#  define elif_x"])
+def test_group_accepts_keywords_outside_directive_position(raw):
+    kind = raw.lstrip("# ").split()[0]
+    ConditionalGroup(entry=_branch(body=[DirectiveNode(kind=kind, raw=raw)]))
+
+
+def test_file_root_rules():
+    assert FileRoot(path="a.h", items=[]).items == ()
+    for kwargs in (dict(path="", items=()), dict(path=" ", items=()), dict(path="a.h", items=None),
+                   dict(path="a.h", items=["x", 1]), dict(path=None, items=())):
+        with pytest.raises(ValueError):
+            FileRoot(**kwargs)
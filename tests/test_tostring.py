@@ -0,0 +1,70 @@
+import pytest
+
+from cpptree.core.tostring import tostring
+from cpptree.models import ConditionalBranch, ConditionalGroup, DirectiveNode, TextBlock
+
+
+def _group():
+    return ConditionalGroup(
+        entry=ConditionalBranch(kind="if", condition="A", body=[TextBlock(content="int a;")], raw="#if A"),
+        elifs=[ConditionalBranch(kind="elif", condition="B", body=[DirectiveNode(kind="define", raw="#define B 1")], raw="#elif B")],
+        else_body=[TextBlock(content="int c;\n")],
+        else_raw="#else",
+        endif_raw="#endif /* A */",
+    )
+
+
+def test_group_with_elif_and_else():
+    assert tostring(_group()) == (
+        "#if A\n"
+        "int a;\n"
+        "#elif B\n"
+        "#define B 1\n"
+        "#else\n"
+        "int c;\n"
+        "#endif /* A */\n"
+    )
+
+
+def test_group_without_else():
+    group = ConditionalGroup(
+        entry=ConditionalBranch(kind="ifndef", condition="H", body=[DirectiveNode(kind="define", raw="#define H")], raw="#ifndef H"),
+    )
+    assert tostring(group) == "#ifndef H\n#define H\n#endif\n"
+
+
+def test_files_dict_emits_line_markers_in_order():
+    files = {
+        "b.h": [DirectiveNode(kind="pragma", raw="#pragma once")],
+        "C:\\src\\a \"x\".c": (DirectiveNode(kind="include", raw='#include "b.h"'), TextBlock(content="")),
+    }
+    assert tostring(files) == (
+        '# 1 "b.h"\n'
+        "#pragma once\n"
+        '# 1 "C:\\\\src\\\\a \\"x\\".c"\n'
+        '#include "b.h"\n'
+    )
+
+
+def test_deep_nesting_does_not_recurse():
+    nodes = [TextBlock(content="x")]
+    for _ in range(5000):
+        nodes = [ConditionalGroup(entry=ConditionalBranch(kind="if", condition="1", body=nodes, raw="#if 1"))]
+    out = tostring(nodes)
+    assert out.count("#if 1\n") == 5000 and out.count("#endif\n") == 5000
+
+
+def test_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        tostring([TextBlock(content="a"), "not a node"])
+
+
+def test_raw_lines_keep_a_single_newline():
+    group = ConditionalGroup(
+        entry=ConditionalBranch(kind="if", condition="A", body=[DirectiveNode(kind="define", raw="#define X\n")], raw="#if A\n"),
+        else_body=[TextBlock(content="y\n")],
+        else_raw="#else\n",
+        endif_raw="#endif\n",
+    )
+    assert tostring(DirectiveNode(kind="define", raw="#define X\n")) == "#define X\n"
+    assert tostring(group) == "#if A\n#define X\n#else\ny\n#endif\n"
@@ -0,0 +1,92 @@
+import pytest
+
+import cpptree.models as models
+from cpptree.models import ConditionalBranch, ConditionalGroup, DirectiveNode, FileRoot, TextBlock
+
+
+@pytest.fixture(params=[False, True], ids=["validating", "trusted"])
+def trust(request, monkeypatch):
+    monkeypatch.setattr(models, "TRUST_INPUTS", request.param)
+    return request.param
+
+
+def _tree(make):
+    text = make(TextBlock, content="int x;\n")
+    define = make(DirectiveNode, kind="define", raw="#define GUARD_H")
+    entry = make(ConditionalBranch, kind="ifndef", condition="GUARD_H", body=[define, text], raw="#ifndef GUARD_H")
+    elif_ = make(ConditionalBranch, kind="elif", condition="X > 1", body=[text], raw="#elif X > 1")
+    group = make(ConditionalGroup, entry=entry, elifs=[elif_], else_body=[text], else_raw="#else")
+    return make(FileRoot, path="a.h", items=[group, define])
+
+
+@pytest.mark.parametrize("kind", ["if", "ifdef", "elif", "endif", "bogus"])
+def test_directive_kind_guard(trust, kind):
+    with pytest.raises(ValueError):
+        DirectiveNode.make_trusted(kind=kind, raw=f"#{kind} X")
+
+
+@pytest.mark.parametrize("kind", ["define", "include", "endif", "bogus"])
+def test_branch_kind_guard(trust, kind):
+    with pytest.raises(ValueError):
+        ConditionalBranch.make_trusted(kind=kind, condition="X", body=(), raw=f"#{kind} X")
+
+
+def test_leaf_and_group_kind_guard(trust):
+    with pytest.raises(ValueError):
+        TextBlock.make_trusted(kind="define", content="x")
+    entry = ConditionalBranch.make_trusted(kind="if", condition="1", body=(), raw="#if 1")
+    with pytest.raises(ValueError):
+        ConditionalGroup.make_trusted(kind="text", entry=entry)
+
+
+@pytest.mark.parametrize("raw", ["#undef X", "#definex", "define X", "#"])
+def test_mismatched_raw_is_rejected(trust, raw):
+    with pytest.raises(ValueError):
+        DirectiveNode.make_trusted(kind="define", raw=raw)
+    with pytest.raises(ValueError):
+        ConditionalBranch.make_trusted(kind="ifdef", condition="X", body=(), raw=raw.replace("define", "ifdef"))
+
+
+def test_lists_are_frozen_to_tuples(trust):
+    root = _tree(lambda cls, **kw: cls.make_trusted(**kw))
+    group = root.items[0]
+    assert type(root.items) is tuple
+    assert type(group.entry.body) is tuple and type(group.elifs) is tuple
+    assert type(group.elifs[0].body) is tuple and type(group.else_body) is tuple
+
+
+def test_trusted_nodes_equal_validated_nodes(trust):
+    trusted = _tree(lambda cls, **kw: cls.make_trusted(**kw))
+    validated = _tree(lambda cls, **kw: cls(**kw))
+    assert trusted == validated
+    assert hash(trusted) == hash(validated)
+    assert {trusted: 1}[validated] == 1
+
+
+def test_trusted_strings_are_interned(trust):
+    a = DirectiveNode.make_trusted(kind="pragma", raw="".join(["#pragma ", "once"]))
+    b = DirectiveNode.make_trusted(kind="pragma", raw="#pragma once")
+    assert a.raw is b.raw
+
+
+def test_unknown_and_missing_fields_are_rejected(trust):
+    with pytest.raises(TypeError):
+        TextBlock.make_trusted(content="x", extra=1)
+    with pytest.raises(TypeError):
+        ConditionalBranch.make_trusted(kind="if", condition="1", raw="#if 1")
+
+
+def test_flag_controls_validation(trust):
+    # a wrong condition is only caught by the full validating constructor
+    make = lambda: ConditionalBranch.make_trusted(kind="ifdef", condition="1X", body=(), raw="#ifdef 1X")
+    if trust:
+        assert make().condition == "1X"
+    else:
+        with pytest.raises(ValueError):
+            make()
+
+
+def test_group_else_body_needs_else_raw(trust):
+    entry = ConditionalBranch.make_trusted(kind="if", condition="1", body=(), raw="#if 1")
+    with pytest.raises(ValueError):
+        ConditionalGroup.make_trusted(entry=entry, else_body=[TextBlock.make_trusted(content="y\n")])
@@ -0,0 +1,64 @@
+import pytest
+
+from cpptree.core import validate
+from cpptree.core.validate import validate_directives_bulk
+from cpptree.models import ConditionalBranch, DirectiveNode
+
+CASES = [
+    ("#include <a.h>", "include", True),
+    ("  # include x", "include", True),
+    ("#\tdefine X 1", "define", True),
+    ("#definex", "define", False),
+    ("#if 1", "if", True),
+    ("# ifdef X", "ifdef", True),
+    ("#ifdefX", "ifdef", False),
+    ("#   elif 2", "elif", True),
+    ("#pragma once", "pragma", True),
+    ("#error", "error", True),
+    ("#errors", "error", False),
+    ("#include x", "define", False),
+    ("x", "include", False),
+    ("", "define", False),
+    ("#", "if", False),
+    ("#endif", "endif", False),  # not a node kind
+    ("#éinclude", "include", False),
+    ("# include é", "include", True),
+]
+RAWS = [raw for raw, _, _ in CASES]
+KINDS = [kind for _, kind, _ in CASES]
+EXPECTED = [ok for _, _, ok in CASES]
+
+
+def test_python_path_matches_expected():
+    assert validate._validate_py(RAWS, KINDS) == EXPECTED
+
+
+def test_python_path_matches_node_constructors():
+    for raw, kind, ok in CASES:
+        try:
+            if kind in ("if", "ifdef", "ifndef", "elif"):
+                ConditionalBranch(kind=kind, condition="X", body=[], raw=raw)
+            else:
+                DirectiveNode(kind=kind, raw=raw)
+            built = True
+        except ValueError:
+            built = False
+        assert built == ok, raw
+
+
+def test_compiled_kernel_matches_python_path():
+    pytest.importorskip("numba")
+    assert validate.njit is not None
+    assert validate_directives_bulk(RAWS, KINDS) == validate._validate_py(RAWS, KINDS)
+    # larger batch, mixed ASCII / non-ASCII buffers
+    raws, kinds = RAWS * 50, KINDS * 50
+    assert validate_directives_bulk(raws, kinds) == validate._validate_py(raws, kinds)
+    ascii_only = [(r, k) for r, k in zip(RAWS, KINDS) if r.isascii()]
+    raws, kinds = [r for r, _ in ascii_only], [k for _, k in ascii_only]
+    assert validate_directives_bulk(raws, kinds) == validate._validate_py(raws, kinds)
+
+
+def test_length_mismatch():
+    with pytest.raises(ValueError):
+        validate_directives_bulk(["#if 1"], [])
+    assert validate_directives_bulk([], []) == []